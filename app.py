@@ -1,11 +1,18 @@
 import sqlite3
 import os
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file
+from flask import Flask, render_template, stream_template, request, redirect, url_for, flash, get_flashed_messages, jsonify, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-import pandas as pd
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
+import numpy as np
 from dateutil.relativedelta import relativedelta
+import csv
 import io
 
 app = Flask(__name__)
@@ -17,6 +24,19 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Argon2 is memory-hard and releases the GIL during the C call, so
+# concurrent logins hash in parallel instead of pinning a worker thread.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
+def verify_password(password_hash, password):
+    """Check a password against an argon2 hash, falling back to legacy werkzeug hashes"""
+    try:
+        return password_hasher.verify(password_hash, password)
+    except VerifyMismatchError:
+        return False
+    except InvalidHashError:
+        return check_password_hash(password_hash, password)
+
 class User(UserMixin):
     def __init__(self, id, username, email):
         self.id = id
@@ -25,18 +45,21 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    conn = get_db_connection()
-    user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuple; skip the Row factory on this per-request path
+        user = cursor.execute('SELECT id, username, email FROM users WHERE id = ?', (user_id,)).fetchone()
     if user:
-        return User(user['id'], user['username'], user['email'])
+        return User(*user)
     return None
 
 def init_db():
     """Initialize the database with required tables"""
     conn = sqlite3.connect(DATABASE)
     cursor = conn.cursor()
-    
+
+    cursor.execute('PRAGMA journal_mode=WAL')
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,7 +80,73 @@ def init_db():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
-    
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses(user_id, date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_user_cat ON expenses(user_id, category)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_user_amount ON expenses(user_id, amount DESC)')
+
+    summary_exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_month_totals'").fetchone()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_month_totals (
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (user_id, month)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS expenses_month_totals_insert
+        AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO user_month_totals (user_id, month, total)
+            VALUES (NEW.user_id, substr(NEW.date, 1, 7), NEW.amount)
+            ON CONFLICT(user_id, month) DO UPDATE SET total = total + NEW.amount;
+        END
+    ''')
+
+    # Drop and recreate so existing databases pick up trigger changes;
+    # both decrementing triggers remove a month row once it empties
+    # (abs() below a tiny epsilon absorbs float residue) so emptied
+    # months don't linger as zeros in the trend and forecast
+    cursor.execute('DROP TRIGGER IF EXISTS expenses_month_totals_delete')
+    cursor.execute('''
+        CREATE TRIGGER expenses_month_totals_delete
+        AFTER DELETE ON expenses
+        BEGIN
+            UPDATE user_month_totals SET total = total - OLD.amount
+            WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7);
+            DELETE FROM user_month_totals
+            WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND abs(total) < 1e-9;
+        END
+    ''')
+
+    cursor.execute('DROP TRIGGER IF EXISTS expenses_month_totals_update')
+    cursor.execute('''
+        CREATE TRIGGER expenses_month_totals_update
+        AFTER UPDATE ON expenses
+        BEGIN
+            UPDATE user_month_totals SET total = total - OLD.amount
+            WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7);
+            DELETE FROM user_month_totals
+            WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND abs(total) < 1e-9;
+            INSERT INTO user_month_totals (user_id, month, total)
+            VALUES (NEW.user_id, substr(NEW.date, 1, 7), NEW.amount)
+            ON CONFLICT(user_id, month) DO UPDATE SET total = total + NEW.amount;
+        END
+    ''')
+
+    if not summary_exists:
+        # Backfill the summary once from any pre-existing expenses
+        cursor.execute('''
+            INSERT INTO user_month_totals (user_id, month, total)
+            SELECT user_id, substr(date, 1, 7), SUM(amount)
+            FROM expenses
+            GROUP BY user_id, substr(date, 1, 7)
+        ''')
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_budget (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -71,147 +160,319 @@ def init_db():
     conn.commit()
     conn.close()
 
+class SQLiteConnectionPool:
+    """Bounded thread-safe pool of pre-configured SQLite connections"""
+
+    def __init__(self, database, size=5):
+        self.database = database
+        self.size = size
+        self._connections = queue.Queue(maxsize=size)
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _create_connection(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-32000')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=134217728')
+        return conn
+
+    def get(self):
+        """Borrow a connection, opening a new one if the pool is not full yet"""
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._opened < self.size:
+                    self._opened += 1
+                    return self._create_connection()
+        return self._connections.get()
+
+    def put(self, conn):
+        """Return a borrowed connection to the pool"""
+        self._connections.put(conn)
+
+_pool = SQLiteConnectionPool(DATABASE)
+
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get database connection from the pool"""
+    return _pool.get()
 
-def get_budget(user_id):
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection and return it to the pool when done"""
+    conn = _pool.get()
+    try:
+        yield conn
+    finally:
+        # Never return an in-transaction connection: a leftover implicit
+        # transaction would hold the writer lock and block other writers
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put(conn)
+
+def get_budget(user_id, conn=None):
     """Get user budget settings"""
-    conn = get_db_connection()
+    if conn is None:
+        with db_connection() as conn:
+            return get_budget(user_id, conn)
     budget = conn.execute('SELECT * FROM user_budget WHERE user_id = ?', (user_id,)).fetchone()
     if not budget:
-        conn.execute('INSERT INTO user_budget (user_id, monthly_income, savings_goal) VALUES (?, ?, ?)', 
+        conn.execute('INSERT INTO user_budget (user_id, monthly_income, savings_goal) VALUES (?, ?, ?)',
                     (user_id, 5000.0, 1000.0))
         conn.commit()
         budget = conn.execute('SELECT * FROM user_budget WHERE user_id = ?', (user_id,)).fetchone()
-    conn.close()
     return budget
 
-def get_expenses(user_id, category=None, start_date=None, end_date=None, search=None, sort_by='date', sort_order='DESC'):
-    """Get expenses with optional filters"""
-    conn = get_db_connection()
-    query = 'SELECT * FROM expenses WHERE user_id = ?'
+# Composed filter/query strings cached per permutation so every call reuses
+# identical SQL text and hits SQLite's per-connection statement cache
+_where_cache = {}
+_query_cache = {}
+
+def build_expense_filters(user_id, category=None, start_date=None, end_date=None, search=None):
+    """Build the shared WHERE clause and parameters for expense queries"""
+    has_category = bool(category and category != 'All')
+    key = (has_category, bool(start_date), bool(end_date), bool(search))
+
     params = [user_id]
-    
-    if category and category != 'All':
-        query += ' AND category = ?'
+    if has_category:
         params.append(category)
-    
     if start_date:
-        query += ' AND date >= ?'
         params.append(start_date)
-    
     if end_date:
-        query += ' AND date <= ?'
         params.append(end_date)
-    
     if search:
-        query += ' AND (note LIKE ? OR category LIKE ?)'
         params.extend([f'%{search}%', f'%{search}%'])
-    
-    if sort_by in ['date', 'amount', 'category']:
-        safe_order = 'ASC' if sort_order == 'ASC' else 'DESC'
-        query += f' ORDER BY {sort_by} {safe_order}'
-    
-    expenses = conn.execute(query, params).fetchall()
-    conn.close()
-    return expenses
 
-def calculate_category_spending(user_id):
-    """Calculate spending by category for pie chart"""
-    conn = get_db_connection()
-    result = conn.execute('''
-        SELECT category, SUM(amount) as total 
-        FROM expenses 
-        WHERE user_id = ?
-        GROUP BY category
-    ''', (user_id,)).fetchall()
-    conn.close()
-    return result
+    where = _where_cache.get(key)
+    if where is None:
+        where = 'user_id = ?'
+        if has_category:
+            where += ' AND category = ?'
+        if start_date:
+            where += ' AND date >= ?'
+        if end_date:
+            where += ' AND date <= ?'
+        if search:
+            where += ' AND (note LIKE ? OR category LIKE ?)'
+        _where_cache[key] = where
 
-def calculate_daily_spending(user_id, period='month'):
-    """Calculate daily/weekly/monthly spending for bar chart"""
-    conn = get_db_connection()
-    
-    if period == 'week':
-        days_back = 7
-    elif period == 'month':
-        days_back = 30
-    else:
-        days_back = 30
-    
-    cutoff_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
-    
-    result = conn.execute('''
-        SELECT date, SUM(amount) as total 
-        FROM expenses 
-        WHERE user_id = ? AND date >= ?
-        GROUP BY date 
-        ORDER BY date
-    ''', (user_id, cutoff_date)).fetchall()
-    conn.close()
-    return result
+    return where, params
+
+def get_expenses(user_id, category=None, start_date=None, end_date=None, search=None, sort_by='date', sort_order='DESC', limit=None, offset=None, conn=None):
+    """Get expenses with optional filters"""
+    if conn is None:
+        with db_connection() as conn:
+            return get_expenses(user_id, category, start_date, end_date, search, sort_by, sort_order, limit, offset, conn)
+    where, params = build_expense_filters(user_id, category, start_date, end_date, search)
+
+    if limit is not None:
+        params.append(limit)
+        if offset is not None:
+            params.append(offset)
+
+    # Normalize the sort inputs first so the cache stays bounded
+    if sort_by not in ['date', 'amount', 'category']:
+        sort_by = None
+    safe_order = 'ASC' if sort_order == 'ASC' else 'DESC'
+
+    key = (where, sort_by, safe_order, limit is not None, offset is not None)
+    query = _query_cache.get(key)
+    if query is None:
+        query = 'SELECT id, amount, category, date, note FROM expenses WHERE ' + where
+        if sort_by is not None:
+            query += f' ORDER BY {sort_by} {safe_order}'
+        if limit is not None:
+            query += ' LIMIT ?'
+            if offset is not None:
+                query += ' OFFSET ?'
+        _query_cache[key] = query
+
+    return conn.execute(query, params).fetchall()
+
+def get_expenses_total(user_id, category=None, start_date=None, end_date=None, search=None, conn=None):
+    """Sum expense amounts in SQL using the same filters as get_expenses"""
+    if conn is None:
+        with db_connection() as conn:
+            return get_expenses_total(user_id, category, start_date, end_date, search, conn)
+    where, params = build_expense_filters(user_id, category, start_date, end_date, search)
+    return conn.execute('SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE ' + where, params).fetchone()[0]
+
+def get_dashboard_aggregates(user_id, conn=None, now=None):
+    """Get category, daily and monthly spending totals in one scan
+
+    Runs a single CTE query with a kind marker column so SQLite scans
+    the user's expenses once instead of once per chart. Returns three
+    ordered {key: total} dicts: per-category totals, per-day totals for
+    the last 30 days and per-month totals for the last 180 days.
+    """
+    if conn is None:
+        with db_connection() as conn:
+            return get_dashboard_aggregates(user_id, conn, now)
+    if now is None:
+        now = datetime.now()
+
+    daily_cutoff = (now - timedelta(days=30)).strftime('%Y-%m-%d')
+    monthly_cutoff = (now - timedelta(days=180)).strftime('%Y-%m')
+
+    rows = conn.execute('''
+        WITH e AS (
+            SELECT category, date, amount FROM expenses WHERE user_id = ?
+        )
+        SELECT 'category' as kind, category as key, SUM(amount) as total FROM e GROUP BY category
+        UNION ALL
+        SELECT 'daily', date, SUM(amount) FROM e WHERE date >= ? GROUP BY date
+        UNION ALL
+        SELECT 'monthly', month, total FROM user_month_totals WHERE user_id = ? AND month >= ?
+        ORDER BY kind, key
+    ''', (user_id, daily_cutoff, user_id, monthly_cutoff)).fetchall()
+
+    category_totals = {}
+    daily_totals = {}
+    monthly_totals = {}
+    buckets = {'category': category_totals, 'daily': daily_totals, 'monthly': monthly_totals}
+    for row in rows:
+        buckets[row['kind']][row['key']] = row['total']
+
+    return category_totals, daily_totals, monthly_totals
+
+# Per-user edit generation folded into the change marker: category/date
+# edits alter the aggregates without touching MAX(id), COUNT or SUM, so
+# edit_expense bumps this counter to invalidate cache keys and ETags
+_edit_generations = {}
+_edit_generations_lock = threading.Lock()
+
+def bump_edit_generation(user_id):
+    """Mark a user's expenses as changed in a way the SQL marker can't see"""
+    with _edit_generations_lock:
+        _edit_generations[user_id] = _edit_generations.get(user_id, 0) + 1
+
+def get_expense_version(user_id, conn=None):
+    """Cheap change marker for a user's expenses, used as a cache key"""
+    if conn is None:
+        with db_connection() as conn:
+            return get_expense_version(user_id, conn)
+    marker = conn.execute('''
+        SELECT COALESCE(MAX(id), 0) || ':' || COUNT(*) || ':' || COALESCE(SUM(amount), 0)
+        FROM expenses WHERE user_id = ?
+    ''', (user_id,)).fetchone()[0]
+    return f'{marker}:{_edit_generations.get(user_id, 0)}'
+
+# Dashboard aggregates memoized per (user_id, version, date). A plain
+# lock-guarded dict rather than lru_cache so a cache miss can recompute
+# on the caller's connection instead of borrowing a second one from the
+# pool, which could deadlock once every pooled connection was held.
+_aggregates_cache = OrderedDict()
+_aggregates_cache_lock = threading.Lock()
+AGGREGATES_CACHE_SIZE = 1024
+
+def get_cached_aggregates(user_id, conn=None, now=None, version=None):
+    """Get dashboard aggregates, reusing the cached result while unchanged
+
+    The cache key carries a per-user change marker (adds, deletes and
+    amount edits bump it) plus today's date (the daily and monthly
+    cutoffs move at midnight), so stale entries expire implicitly
+    without the write routes having to invalidate anything.
+    """
+    if now is None:
+        now = datetime.now()
+    if version is None:
+        version = get_expense_version(user_id, conn)
+    key = (user_id, version, now.strftime('%Y-%m-%d'))
+
+    with _aggregates_cache_lock:
+        if key in _aggregates_cache:
+            _aggregates_cache.move_to_end(key)
+            return _aggregates_cache[key]
+
+    aggregates = get_dashboard_aggregates(user_id, conn, now)
+
+    with _aggregates_cache_lock:
+        _aggregates_cache[key] = aggregates
+        while len(_aggregates_cache) > AGGREGATES_CACHE_SIZE:
+            _aggregates_cache.popitem(last=False)
+    return aggregates
+
+def get_monthly_totals(user_id, conn=None, days_back=180, now=None):
+    """Get per-month spending totals for the last N days as an ordered dict
+
+    Reads the trigger-maintained user_month_totals summary table, so the
+    cost scales with the number of months rather than expense rows.
+    """
+    if conn is None:
+        with db_connection() as conn:
+            return get_monthly_totals(user_id, conn, days_back, now)
+    if now is None:
+        now = datetime.now()
+
+    cutoff_month = (now - timedelta(days=days_back)).strftime('%Y-%m')
 
-def forecast_next_month(user_id):
-    """Forecast next month's expenses using simple moving average"""
-    conn = get_db_connection()
-    
-    three_months_ago = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-    
     result = conn.execute('''
-        SELECT strftime('%Y-%m', date) as month, SUM(amount) as total
-        FROM expenses
-        WHERE user_id = ? AND date >= ?
-        GROUP BY month
+        SELECT month, total FROM user_month_totals
+        WHERE user_id = ? AND month >= ?
         ORDER BY month
-    ''', (user_id, three_months_ago)).fetchall()
-    conn.close()
-    
-    if len(result) == 0:
+    ''', (user_id, cutoff_month)).fetchall()
+
+    monthly_totals = {}
+    for row in result:
+        monthly_totals[row['month']] = row['total']
+    return monthly_totals
+
+def forecast_next_month(user_id, conn=None, monthly_totals=None):
+    """Forecast next month's expenses using a vectorized moving average
+
+    The history lives in a NumPy array so the simple three-month mean
+    can later become a weighted or exponential average without adding
+    per-month Python-loop cost as the history grows.
+    """
+    if monthly_totals is None:
+        monthly_totals = get_monthly_totals(user_id, conn)
+
+    history = np.fromiter(monthly_totals.values(), dtype=np.float64)
+    if history.size == 0:
         return 0
-    
-    total_spending = sum([row['total'] for row in result])
-    avg_monthly = total_spending / max(len(result), 1)
-    return round(avg_monthly, 2)
 
-def get_monthly_trend(user_id):
+    return round(float(np.mean(history[-3:])), 2)
+
+def get_monthly_trend(user_id, conn=None, monthly_totals=None, now=None):
     """Get monthly spending trend for line chart with forecast"""
-    conn = get_db_connection()
-    
-    six_months_ago = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-%d')
-    
-    result = conn.execute('''
-        SELECT strftime('%Y-%m', date) as month, SUM(amount) as total
-        FROM expenses
-        WHERE user_id = ? AND date >= ?
-        GROUP BY month
-        ORDER BY month
-    ''', (user_id, six_months_ago)).fetchall()
-    conn.close()
-    
-    monthly_data = {}
-    for row in result:
-        monthly_data[row['month']] = row['total']
-    
-    next_month = (datetime.now() + relativedelta(months=1)).strftime('%Y-%m')
-    forecast_amount = forecast_next_month(user_id)
+    if now is None:
+        now = datetime.now()
+    if monthly_totals is None:
+        monthly_totals = get_monthly_totals(user_id, conn, now=now)
+
+    monthly_data = dict(monthly_totals)
+
+    next_month = (now + relativedelta(months=1)).strftime('%Y-%m')
+    forecast_amount = forecast_next_month(user_id, monthly_totals=monthly_totals)
     monthly_data[next_month] = forecast_amount
-    
+
     return monthly_data
 
-def get_top_expenses(user_id, limit=3):
+def add_expenses(user_id, rows, conn=None):
+    """Insert one or more (amount, category, date, note) expenses in a single transaction"""
+    if conn is None:
+        with db_connection() as conn:
+            return add_expenses(user_id, rows, conn)
+    conn.executemany('INSERT INTO expenses (user_id, amount, category, date, note) VALUES (?, ?, ?, ?, ?)',
+                     [(user_id,) + tuple(row) for row in rows])
+    conn.commit()
+
+def get_top_expenses(user_id, limit=3, conn=None):
     """Get top N highest expenses"""
-    conn = get_db_connection()
-    expenses = conn.execute('''
-        SELECT * FROM expenses 
+    if conn is None:
+        with db_connection() as conn:
+            return get_top_expenses(user_id, limit, conn)
+    return conn.execute('''
+        SELECT id, amount, category, date, note FROM expenses
         WHERE user_id = ?
-        ORDER BY amount DESC 
+        ORDER BY amount DESC
         LIMIT ?
     ''', (user_id, limit)).fetchall()
-    conn.close()
-    return expenses
 
 @app.route('/signup', methods=['GET', 'POST'])
 def signup():
@@ -225,21 +486,20 @@ def signup():
             flash('Password must be at least 8 characters long!', 'danger')
             return redirect(url_for('signup'))
         
-        conn = get_db_connection()
-        
-        existing_user = conn.execute('SELECT * FROM users WHERE username = ? OR email = ?', 
-                                     (username, email)).fetchone()
-        if existing_user:
-            flash('Username or email already exists!', 'danger')
-            conn.close()
-            return redirect(url_for('signup'))
-        
-        password_hash = generate_password_hash(password)
-        conn.execute('INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
-                    (username, email, password_hash))
-        conn.commit()
-        conn.close()
-        
+        password_hash = password_hasher.hash(password)
+
+        # Let the UNIQUE constraints reject duplicates instead of probing
+        # with an OR query that can't use either index
+        with db_connection() as conn:
+            try:
+                conn.execute('INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                            (username, email, password_hash))
+                conn.commit()
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                flash('Username or email already exists!', 'danger')
+                return redirect(url_for('signup'))
+
         flash('Account created successfully! Please login.', 'success')
         return redirect(url_for('login'))
     
@@ -252,11 +512,17 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
-        conn.close()
-        
-        if user and check_password_hash(user['password_hash'], password):
+        with db_connection() as conn:
+            user = conn.execute('SELECT id, username, email, password_hash FROM users WHERE username = ?',
+                                (username,)).fetchone()
+
+        if user and verify_password(user['password_hash'], password):
+            if not user['password_hash'].startswith('$argon2'):
+                # Transparently upgrade legacy werkzeug hashes on successful login
+                with db_connection() as conn:
+                    conn.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+                                (password_hasher.hash(password), user['id']))
+                    conn.commit()
             user_obj = User(user['id'], user['username'], user['email'])
             login_user(user_obj)
             flash('Login successful!', 'success')
@@ -286,36 +552,35 @@ def dashboard():
     sort_by = request.args.get('sort_by', 'date')
     sort_order = request.args.get('sort_order', 'DESC')
     
-    expenses = get_expenses(current_user.id, category_filter, start_date, end_date, search, sort_by, sort_order)
-    budget = get_budget(current_user.id)
-    category_spending = calculate_category_spending(current_user.id)
-    daily_spending = calculate_daily_spending(current_user.id, 'month')
-    forecast = forecast_next_month(current_user.id)
-    top_expenses = get_top_expenses(current_user.id, 3)
-    monthly_trend = get_monthly_trend(current_user.id)
-    
-    total_spent = sum([expense['amount'] for expense in expenses])
+    now = datetime.now()
+
+    with db_connection() as conn:
+        expenses = get_expenses(current_user.id, category_filter, start_date, end_date, search, sort_by, sort_order, conn=conn)
+        budget = get_budget(current_user.id, conn=conn)
+        # Chart datasets are fetched client-side from /api/aggregates;
+        # the render only needs the monthly totals for the forecast card
+        _, _, monthly_totals = get_cached_aggregates(current_user.id, conn=conn, now=now)
+        forecast = forecast_next_month(current_user.id, monthly_totals=monthly_totals)
+        top_expenses = get_top_expenses(current_user.id, 3, conn=conn)
+        total_spent = get_expenses_total(current_user.id, category_filter, start_date, end_date, search, conn=conn)
+
     remaining_budget = budget['monthly_income'] - total_spent if budget else 0
-    
+
     categories = ['Food', 'Rent', 'Travel', 'Entertainment', 'Bills', 'Other']
-    
-    category_data = {cat: 0 for cat in categories}
-    for row in category_spending:
-        if row['category'] in category_data:
-            category_data[row['category']] = row['total']
-    
-    daily_data = {}
-    for row in daily_spending:
-        daily_data[row['date']] = row['total']
-    
-    return render_template('dashboard.html',
+
+    # Pop flashes before streaming: the session cookie is written before
+    # the generator runs, so popping them inside the template would
+    # happen too late and they would reappear on every load
+    messages = get_flashed_messages(with_categories=True)
+
+    # Stream the render so headers and the page head go out while the
+    # expense table is still being generated
+    return Response(stream_template('dashboard.html',
+                         messages=messages,
                          expenses=expenses,
                          budget=budget,
                          total_spent=total_spent,
                          remaining_budget=remaining_budget,
-                         category_data=category_data,
-                         daily_data=daily_data,
-                         monthly_trend=monthly_trend,
                          forecast=forecast,
                          top_expenses=top_expenses,
                          categories=categories,
@@ -324,7 +589,50 @@ def dashboard():
                          end_date=end_date,
                          search=search,
                          sort_by=sort_by,
-                         sort_order=sort_order)
+                         sort_order=sort_order))
+
+@app.route('/api/aggregates')
+@login_required
+def api_aggregates():
+    """Chart datasets as JSON with a version-based ETag for conditional GETs
+
+    The ETag derives from the cheap per-user change marker plus today's
+    date, so a refresh that sends a matching If-None-Match gets a 304
+    straight from the version probe without running the aggregates or
+    rendering anything.
+    """
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+
+    with db_connection() as conn:
+        version = get_expense_version(current_user.id, conn)
+        etag = f'{current_user.id}:{version}:{today}'
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        category_totals, daily_totals, monthly_totals = get_cached_aggregates(current_user.id, conn=conn, now=now, version=version)
+        forecast = forecast_next_month(current_user.id, monthly_totals=monthly_totals)
+        monthly_trend = get_monthly_trend(current_user.id, monthly_totals=monthly_totals, now=now)
+
+    categories = ['Food', 'Rent', 'Travel', 'Entertainment', 'Bills', 'Other']
+    category_data = {cat: 0 for cat in categories}
+    for category, total in category_totals.items():
+        if category in category_data:
+            category_data[category] = total
+
+    response = jsonify({
+        'category_data': category_data,
+        'daily_data': daily_totals,
+        'monthly_trend': monthly_trend,
+        'forecast': forecast
+    })
+    response.set_etag(etag)
+    # no-cache makes browsers revalidate with If-None-Match on each load
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/add', methods=['GET', 'POST'])
 @login_required
@@ -336,42 +644,85 @@ def add_expense():
         date = request.form['date']
         note = request.form.get('note', '')
         
-        conn = get_db_connection()
-        conn.execute('INSERT INTO expenses (user_id, amount, category, date, note) VALUES (?, ?, ?, ?, ?)',
-                    (current_user.id, amount, category, date, note))
-        conn.commit()
-        conn.close()
-        
+        add_expenses(current_user.id, [(amount, category, date, note)])
+
         flash('Expense added successfully!', 'success')
         return redirect(url_for('dashboard'))
-    
+
     categories = ['Food', 'Rent', 'Travel', 'Entertainment', 'Bills', 'Other']
     return render_template('add_expense.html', categories=categories)
 
+@app.route('/add_bulk', methods=['POST'])
+@login_required
+def add_bulk():
+    """Add multiple expenses at once from a JSON array or an uploaded CSV"""
+    rows = []
+
+    if request.files.get('file'):
+        text = request.files['file'].read().decode('utf-8')
+        for line_number, record in enumerate(csv.reader(io.StringIO(text)), start=1):
+            if not record:
+                continue
+            if line_number == 1 and record[0].strip().lower() == 'amount':
+                continue
+            if len(record) < 3:
+                return jsonify({'error': f'Line {line_number}: expected amount, category and date'}), 400
+            note = record[3] if len(record) > 3 else ''
+            rows.append((record[0], record[1], record[2], note))
+    else:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, list):
+            return jsonify({'error': 'Expected a JSON array of expenses'}), 400
+        for position, record in enumerate(payload, start=1):
+            if not isinstance(record, dict) or not all(field in record for field in ('amount', 'category', 'date')):
+                return jsonify({'error': f'Expense {position}: amount, category and date are required'}), 400
+            rows.append((record['amount'], record['category'], record['date'], record.get('note', '')))
+
+    if not rows:
+        return jsonify({'error': 'No expenses provided'}), 400
+
+    validated = []
+    for position, (amount, category, date, note) in enumerate(rows, start=1):
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Expense {position}: amount must be a number'}), 400
+        validated.append((amount, category, date, note))
+
+    add_expenses(current_user.id, validated)
+
+    if request.is_json:
+        return jsonify({'added': len(rows)})
+
+    flash(f'{len(rows)} expenses added successfully!', 'success')
+    return redirect(url_for('dashboard'))
+
 @app.route('/edit/<int:expense_id>', methods=['GET', 'POST'])
 @login_required
 def edit_expense(expense_id):
     """Edit existing expense"""
-    conn = get_db_connection()
-    
     if request.method == 'POST':
         amount = request.form['amount']
         category = request.form['category']
         date = request.form['date']
         note = request.form.get('note', '')
-        
-        conn.execute('UPDATE expenses SET amount = ?, category = ?, date = ?, note = ? WHERE id = ? AND user_id = ?',
-                    (amount, category, date, note, expense_id, current_user.id))
-        conn.commit()
-        conn.close()
-        
+
+        with db_connection() as conn:
+            conn.execute('UPDATE expenses SET amount = ?, category = ?, date = ?, note = ? WHERE id = ? AND user_id = ?',
+                        (amount, category, date, note, expense_id, current_user.id))
+            conn.commit()
+
+        # Category/date-only edits don't move the SQL marker, so bump the
+        # edit generation to invalidate cached aggregates and ETags
+        bump_edit_generation(current_user.id)
+
         flash('Expense updated successfully!', 'success')
         return redirect(url_for('dashboard'))
-    
-    expense = conn.execute('SELECT * FROM expenses WHERE id = ? AND user_id = ?', 
-                          (expense_id, current_user.id)).fetchone()
-    conn.close()
-    
+
+    with db_connection() as conn:
+        expense = conn.execute('SELECT id, amount, category, date, note FROM expenses WHERE id = ? AND user_id = ?',
+                              (expense_id, current_user.id)).fetchone()
+
     if not expense:
         flash('Expense not found!', 'danger')
         return redirect(url_for('dashboard'))
@@ -383,11 +734,10 @@ def edit_expense(expense_id):
 @login_required
 def delete_expense(expense_id):
     """Delete expense"""
-    conn = get_db_connection()
-    conn.execute('DELETE FROM expenses WHERE id = ? AND user_id = ?', (expense_id, current_user.id))
-    conn.commit()
-    conn.close()
-    
+    with db_connection() as conn:
+        conn.execute('DELETE FROM expenses WHERE id = ? AND user_id = ?', (expense_id, current_user.id))
+        conn.commit()
+
     flash('Expense deleted successfully!', 'success')
     return redirect(url_for('dashboard'))
 
@@ -399,12 +749,11 @@ def set_budget():
         monthly_income = request.form['monthly_income']
         savings_goal = request.form['savings_goal']
         
-        conn = get_db_connection()
-        conn.execute('UPDATE user_budget SET monthly_income = ?, savings_goal = ? WHERE user_id = ?',
-                    (monthly_income, savings_goal, current_user.id))
-        conn.commit()
-        conn.close()
-        
+        with db_connection() as conn:
+            conn.execute('UPDATE user_budget SET monthly_income = ?, savings_goal = ? WHERE user_id = ?',
+                        (monthly_income, savings_goal, current_user.id))
+            conn.commit()
+
         flash('Budget settings updated!', 'success')
         return redirect(url_for('dashboard'))
     
@@ -414,30 +763,38 @@ def set_budget():
 @app.route('/export')
 @login_required
 def export_expenses():
-    """Export current month's expenses to CSV"""
-    current_month = datetime.now().strftime('%Y-%m')
-    
-    conn = get_db_connection()
-    expenses = conn.execute('''
-        SELECT * FROM expenses 
-        WHERE user_id = ? AND strftime('%Y-%m', date) = ?
-        ORDER BY date DESC
-    ''', (current_user.id, current_month)).fetchall()
-    conn.close()
-    
-    df = pd.DataFrame([dict(expense) for expense in expenses])
-    
-    output = io.BytesIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
-    
+    """Export current month's expenses as a streamed CSV"""
+    now = datetime.now()
+    current_month = now.strftime('%Y-%m')
+    # Filter on a [start, next month) range instead of strftime so the
+    # (user_id, date) index can range-scan
+    month_start = now.replace(day=1).strftime('%Y-%m-%d')
+    next_month_start = (now.replace(day=1) + relativedelta(months=1)).strftime('%Y-%m-%d')
+    user_id = current_user.id
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['id', 'user_id', 'amount', 'category', 'date', 'note'])
+        with db_connection() as conn:
+            cursor = conn.execute('''
+                SELECT id, user_id, amount, category, date, note FROM expenses
+                WHERE user_id = ? AND date >= ? AND date < ?
+                ORDER BY date DESC
+            ''', (user_id, month_start, next_month_start))
+            for row in cursor:
+                writer.writerow(tuple(row))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
     filename = f'expenses_{current_month}.csv'
-    
-    return send_file(
-        output,
+
+    return Response(
+        stream_with_context(generate()),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=filename
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 if __name__ == '__main__':